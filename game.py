@@ -1,9 +1,14 @@
 import pygame
+import numpy as np
 import random
-import time
 import math
 from typing import List, Tuple, Optional
 
+try:
+    from numba import njit
+except ImportError:  # Numba is optional, particles fall back to NumPy
+    njit = None
+
 # Initialize Pygame
 pygame.init()
 
@@ -25,6 +30,10 @@ GRID_WIDTH = 10
 GRID_HEIGHT = 20
 PREVIEW_SIZE = 4
 
+# Controls panel dimensions
+CONTROLS_WIDTH = 200
+CONTROLS_HEIGHT = 200
+
 # Window dimensions
 WINDOW_WIDTH = BLOCK_SIZE * (GRID_WIDTH + 8)  # Extra space for UI
 WINDOW_HEIGHT = BLOCK_SIZE * GRID_HEIGHT + 100
@@ -42,48 +51,185 @@ TETROMINOS = [
 
 TETROMINO_COLORS = [CYAN, YELLOW, MAGENTA, ORANGE, BLUE, GREEN, RED]
 
+def rotate_shape(shape: List[List[int]]) -> List[List[int]]:
+    """Rotate a shape matrix 90 degrees clockwise"""
+    rows = len(shape)
+    cols = len(shape[0])
+    rotated = [[0 for _ in range(rows)] for _ in range(cols)]
+    
+    for r in range(rows):
+        for c in range(cols):
+            rotated[c][rows - 1 - r] = shape[r][c]
+    
+    return rotated
+
+def build_rotations(shape: List[List[int]]) -> List[Tuple[Tuple[int, int], ...]]:
+    """Get the (dx, dy) block offsets of all 4 rotations of a shape"""
+    rotations = []
+    for _ in range(4):
+        rotations.append(tuple((c, r) for r in range(len(shape))
+                               for c in range(len(shape[0])) if shape[r][c]))
+        shape = rotate_shape(shape)
+    return rotations
+
+# Precomputed block offsets per shape and rotation
+ROTATIONS = [build_rotations(shape) for shape in TETROMINOS]
+
+# The same rotations packed as 4x4 bitmasks (bit dy * 4 + dx is set per block)
+ROTATION_MASKS = [[sum(1 << (dy * 4 + dx) for dx, dy in offsets) for offsets in rotations]
+                  for rotations in ROTATIONS]
+
+# Per-row bits of each rotation (bit dx is set per block), top row first
+ROTATION_ROWS = [[tuple(mask >> (4 * r) & 0xF for r in range(4) if mask >> (4 * r) & 0xF)
+                  for mask in masks]
+                 for masks in ROTATION_MASKS]
+
+# Bitboard rows: column x is bit BOARD_PAD + x, with sentinel wall bits on both sides
+BOARD_PAD = 4
+FLOOR_MASK = (1 << (GRID_WIDTH + 2 * BOARD_PAD)) - 1
+WALL_MASK = FLOOR_MASK & ~(((1 << GRID_WIDTH) - 1) << BOARD_PAD)
+COLUMN_BITS = 1 << (BOARD_PAD + np.arange(GRID_WIDTH, dtype=np.int64))
+
+# Grid cells store an index into this palette (0 = empty)
+PALETTE = [BLACK] + TETROMINO_COLORS
+
+# Particles are stored as parallel arrays, one per field
+PARTICLE_FIELDS = [
+    ('p_x', np.float32),
+    ('p_y', np.float32),
+    ('p_vx', np.float32),
+    ('p_vy', np.float32),
+    ('p_life', np.float32),
+    ('p_size', np.uint8),
+    ('p_color', np.uint8),  # Palette index
+]
+PARTICLE_CAPACITY = 256  # Initial capacity, grown on demand
+PARTICLE_ALPHA_LEVELS = 16  # Particle alpha is quantized to this many levels
+
+def step_particles_loop(x, y, vx, vy, life, size, color, n):
+    """Advance n particles one frame in a single fused pass and return the
+    number still alive, compacted to the front of the arrays"""
+    alive = 0
+    for i in range(n):
+        x[i] += vx[i]
+        y[i] += vy[i]
+        vy[i] += 0.2  # Gravity
+        life[i] -= 0.02  # Fade out
+        if life[i] > 0:
+            x[alive] = x[i]
+            y[alive] = y[i]
+            vx[alive] = vx[i]
+            vy[alive] = vy[i]
+            life[alive] = life[i]
+            size[alive] = size[i]
+            color[alive] = color[i]
+            alive += 1
+    return alive
+
+def step_particles_numpy(x, y, vx, vy, life, size, color, n):
+    """Same as step_particles_loop, using whole-array NumPy operations"""
+    x[:n] += vx[:n]
+    y[:n] += vy[:n]
+    vy[:n] += 0.2  # Gravity
+    life[:n] -= 0.02  # Fade out
+    
+    # Compact the surviving particles to the front of the arrays
+    alive = life[:n] > 0
+    count = int(alive.sum())
+    if count < n:
+        for values in (x, y, vx, vy, life, size, color):
+            values[:count] = values[:n][alive]
+    return count
+
+if njit is not None:
+    step_particles = njit(cache=True, fastmath=True)(step_particles_loop)
+    # Compile once at import rather than on the first line clear
+    step_particles(*(np.zeros(1, dtype=dtype) for _, dtype in PARTICLE_FIELDS), 1)
+else:
+    step_particles = step_particles_numpy
+
 class Tetromino:
     def __init__(self, x: int, y: int, shape_idx: int):
         self.x = x
         self.y = y
-        self.shape = TETROMINOS[shape_idx]
+        self.shape_idx = shape_idx
         self.color = TETROMINO_COLORS[shape_idx]
+        self.color_idx = shape_idx + 1
         self.rotation = 0
     
+    @property
+    def offsets(self) -> Tuple[Tuple[int, int], ...]:
+        """Block offsets of the current rotation"""
+        return ROTATIONS[self.shape_idx][self.rotation]
+    
+    @property
+    def rows(self) -> Tuple[int, ...]:
+        """Per-row block bitmasks of the current rotation"""
+        return ROTATION_ROWS[self.shape_idx][self.rotation]
+    
     def rotate(self):
         """Rotate the tetromino 90 degrees clockwise"""
-        rows = len(self.shape)
-        cols = len(self.shape[0])
-        rotated = [[0 for _ in range(rows)] for _ in range(cols)]
-        
-        for r in range(rows):
-            for c in range(cols):
-                rotated[c][rows - 1 - r] = self.shape[r][c]
-        
-        self.shape = rotated
+        self.rotation = (self.rotation + 1) % len(ROTATIONS[self.shape_idx])
     
     def get_positions(self) -> List[Tuple[int, int]]:
         """Get all block positions of the tetromino"""
-        positions = []
-        for r in range(len(self.shape)):
-            for c in range(len(self.shape[0])):
-                if self.shape[r][c]:
-                    positions.append((self.x + c, self.y + r))
-        return positions
+        return [(self.x + dx, self.y + dy) for dx, dy in self.offsets]
 
 class TetrisGame:
     def __init__(self):
+        self.init_resources()
+        self.reset_state()
+    
+    def init_resources(self):
+        """Create the window, fonts and cached surfaces (done once)"""
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("Tetris")
         self.clock = pygame.time.Clock()
         self.font = pygame.font.Font(None, 36)
         self.small_font = pygame.font.Font(None, 24)
         
-
-        
-        self.grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+        # Static background (border and grid lines) rendered once
+        self.bg_surface = self.render_background()
+        self.controls_surface = self.render_controls()
+        
+        # Screen rect of every grid cell and a pre-rendered block per palette color
+        self.cell_rects = [[pygame.Rect(50 + x * BLOCK_SIZE, 50 + y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
+                            for x in range(GRID_WIDTH)]
+                           for y in range(GRID_HEIGHT)]
+        self.block_templates = [None] + [self.render_block(color) for color in TETROMINO_COLORS]
+        
+        # Game over / pause overlay and its text
+        self.dim_overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        self.dim_overlay.set_alpha(128)
+        self.dim_overlay.fill(BLACK)
+        self.game_over_surf = self.font.render("GAME OVER", True, RED).convert_alpha()
+        self.restart_surf = self.small_font.render("Press R to restart", True, WHITE).convert_alpha()
+        self.paused_surf = self.font.render("PAUSED", True, YELLOW).convert_alpha()
+        
+        # Particle surfaces keyed by (color index, size, alpha level), built lazily
+        self.particle_templates = {}
+        
+        # Particle arrays (only the first p_count entries are alive)
+        for name, dtype in PARTICLE_FIELDS:
+            setattr(self, name, np.zeros(PARTICLE_CAPACITY, dtype=dtype))
+        
+        # Rendered score/level/lines text, re-rendered only when stats change
+        self.score_surf = None
+        self.level_surf = None
+        self.lines_surf = None
+    
+    def reset_state(self):
+        """Reset the game to its initial state for a new game"""
+        self.grid = np.zeros((GRID_HEIGHT, GRID_WIDTH), dtype=np.uint8)
+        self.sync_row_masks()
+        
+        # Placed block blits, rebuilt only when the grid changes
+        self.block_blits = []
+        self.clearing_blocks = []
+        self.grid_dirty = True
         self.current_piece = None
         self.next_piece = None
+        self.bag = []  # Shuffled shape indices still to be dealt
         self.score = 0
         self.lines_cleared = 0
         self.level = 1
@@ -102,53 +248,199 @@ class TetrisGame:
         self.clear_animation_duration = 800  # milliseconds - increased for more visible effect
         
         # Particle effects
-        self.particles = []
+        self.p_count = 0
+        
+        # Score, level and lines text needs re-rendering
+        self.stats_dirty = True
+        
+        # Whether the screen needs to be redrawn
+        self.dirty = True
         
         self.spawn_new_piece()
         self.spawn_new_piece()  # Set next piece
     
+    def render_background(self) -> pygame.Surface:
+        """Render the static grid border and grid lines onto a surface"""
+        surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        surface.fill(BLACK)
+        
+        grid_x = 50
+        grid_y = 50
+        pygame.draw.rect(surface, GRAY, 
+                        (grid_x - 2, grid_y - 2, 
+                         GRID_WIDTH * BLOCK_SIZE + 4, 
+                         GRID_HEIGHT * BLOCK_SIZE + 4), 2)
+        
+        # Draw background grid lines
+        for x in range(GRID_WIDTH + 1):
+            pygame.draw.line(surface, (40, 40, 40), 
+                           (grid_x + x * BLOCK_SIZE, grid_y), 
+                           (grid_x + x * BLOCK_SIZE, grid_y + GRID_HEIGHT * BLOCK_SIZE))
+        for y in range(GRID_HEIGHT + 1):
+            pygame.draw.line(surface, (40, 40, 40), 
+                           (grid_x, grid_y + y * BLOCK_SIZE), 
+                           (grid_x + GRID_WIDTH * BLOCK_SIZE, grid_y + y * BLOCK_SIZE))
+        
+        return surface
+    
+    def render_block(self, color: Tuple[int, int, int]) -> pygame.Surface:
+        """Render a single block with its white border"""
+        surface = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE)).convert()
+        surface.fill(color)
+        pygame.draw.rect(surface, WHITE, (0, 0, BLOCK_SIZE, BLOCK_SIZE), 1)
+        return surface
+    
+    def render_controls(self) -> pygame.Surface:
+        """Render the static controls panel onto a transparent surface"""
+        surface = pygame.Surface((CONTROLS_WIDTH, CONTROLS_HEIGHT), pygame.SRCALPHA)
+        
+        # Draw controls title
+        controls_title = self.font.render("Controls:", True, WHITE)
+        surface.blit(controls_title, (0, 0))
+        
+        # Draw arrow controls with visual arrows
+        arrow_controls = [
+            ("Move Left/Right", "←", "→"),
+            ("Soft Drop", "↓", ""),
+            ("Rotate", "↑", ""),
+            ("Hard Drop", "Space", ""),  # Changed back to "Space" for proper positioning
+            ("Pause", "P", ""),
+            ("Random Blocks", "B", ""),
+            ("Restart", "R", "")
+        ]
+        
+        for i, (action, key1, key2) in enumerate(arrow_controls):
+            y_pos = 40 + i * 22  # Even more compact spacing
+            
+            # Draw action text
+            action_text = self.small_font.render(action, True, GRAY)
+            surface.blit(action_text, (0, y_pos))
+            
+            # Draw key/arrow
+            if key1 in ["←", "→", "↑", "↓"]:
+                # Draw arrow symbol
+                arrow_color = WHITE
+                arrow_size = 8  # Even smaller arrows
+                arrow_x = 140  # Moved closer to text
+                arrow_y = y_pos + 8
+                
+                if key1 == "←":
+                    # Left arrow
+                    pygame.draw.polygon(surface, arrow_color, [
+                        (arrow_x + arrow_size, arrow_y),
+                        (arrow_x, arrow_y + arrow_size//2),
+                        (arrow_x + arrow_size, arrow_y + arrow_size)
+                    ])
+                elif key1 == "→":
+                    # Right arrow
+                    pygame.draw.polygon(surface, arrow_color, [
+                        (arrow_x, arrow_y),
+                        (arrow_x + arrow_size, arrow_y + arrow_size//2),
+                        (arrow_x, arrow_y + arrow_size)
+                    ])
+                elif key1 == "↑":
+                    # Up arrow
+                    pygame.draw.polygon(surface, arrow_color, [
+                        (arrow_x, arrow_y + arrow_size),
+                        (arrow_x + arrow_size//2, arrow_y),
+                        (arrow_x + arrow_size, arrow_y + arrow_size)
+                    ])
+                elif key1 == "↓":
+                    # Down arrow
+                    pygame.draw.polygon(surface, arrow_color, [
+                        (arrow_x, arrow_y),
+                        (arrow_x + arrow_size//2, arrow_y + arrow_size),
+                        (arrow_x + arrow_size, arrow_y)
+                    ])
+                
+                # Draw second arrow if needed (for left/right)
+                if key2 in ["←", "→", "↑", "↓"]:
+                    arrow_x2 = arrow_x + 15  # Even tighter spacing
+                    if key2 == "→":
+                        pygame.draw.polygon(surface, arrow_color, [
+                            (arrow_x2, arrow_y),
+                            (arrow_x2 + arrow_size, arrow_y + arrow_size//2),
+                            (arrow_x2, arrow_y + arrow_size)
+                        ])
+            else:
+                # Draw regular key text
+                key_text = self.small_font.render(key1, True, WHITE)
+                # Position "Space" further left, other keys closer to arrows
+                if key1 == "Space":
+                    key_x = 120  # Much further left for "Space"
+                else:
+                    key_x = 140  # Normal position for P, B, R
+                surface.blit(key_text, (key_x, y_pos))
+        
+        return surface.convert_alpha()
+    
+    def get_particle_template(self, color_idx: int, size: int, alpha_level: int) -> pygame.Surface:
+        """Return a cached particle surface with its color and alpha baked in"""
+        key = (color_idx, size, alpha_level)
+        surface = self.particle_templates.get(key)
+        if surface is None:
+            surface = pygame.Surface((size, size)).convert()
+            surface.fill(PALETTE[color_idx])
+            surface.set_alpha(alpha_level * 255 // (PARTICLE_ALPHA_LEVELS - 1))
+            self.particle_templates[key] = surface
+        return surface
+    
     def spawn_new_piece(self):
         """Spawn a new tetromino"""
         if self.next_piece is None:
-            shape_idx = random.randint(0, len(TETROMINOS) - 1)
+            shape_idx = self.next_shape_idx()
             self.next_piece = Tetromino(GRID_WIDTH // 2 - 1, 0, shape_idx)
         else:
             self.current_piece = self.next_piece
-            shape_idx = random.randint(0, len(TETROMINOS) - 1)
+            shape_idx = self.next_shape_idx()
             self.next_piece = Tetromino(GRID_WIDTH // 2 - 1, 0, shape_idx)
             
             # Check if new piece can be placed (game over condition)
             if not self.is_valid_position(self.current_piece):
                 self.game_over = True
     
+    def next_shape_idx(self) -> int:
+        """Deal the next shape from a 7-bag, reshuffling all shapes when it runs out"""
+        if not self.bag:
+            self.bag = random.sample(range(len(TETROMINOS)), len(TETROMINOS))
+        return self.bag.pop()
+    
     def is_valid_position(self, piece: Tetromino) -> bool:
         """Check if a piece position is valid"""
-        for x, y in piece.get_positions():
-            if (x < 0 or x >= GRID_WIDTH or y >= GRID_HEIGHT or 
-                (y >= 0 and self.grid[y][x])):
+        row_mask = self.row_mask
+        shift = piece.x + BOARD_PAD
+        y = piece.y
+        for r, bits in enumerate(piece.rows):
+            if (row_mask[y + r] >> shift) & bits:
                 return False
         return True
     
+    def sync_row_masks(self):
+        """Rebuild the bitboard rows (walls and floor included) from the grid"""
+        masks = (self.grid != 0).astype(np.int64) @ COLUMN_BITS
+        # Pieces never rise above the top row, so only floor sentinel rows are needed
+        self.row_mask = [int(mask) | WALL_MASK for mask in masks] + [FLOOR_MASK] * 4
+    
     def place_piece(self):
         """Place the current piece on the grid"""
         for x, y in self.current_piece.get_positions():
             if 0 <= y < GRID_HEIGHT and 0 <= x < GRID_WIDTH:
-                self.grid[y][x] = self.current_piece.color
+                self.grid[y, x] = self.current_piece.color_idx
+                self.row_mask[y] |= 1 << (BOARD_PAD + x)
+        self.grid_dirty = True
         
         self.clear_lines()
         self.spawn_new_piece()
     
     def clear_lines(self):
         """Clear completed lines and update score"""
-        lines_to_clear = []
-        for y in range(GRID_HEIGHT):
-            if all(self.grid[y]):
-                lines_to_clear.append(y)
+        lines_to_clear = np.nonzero(self.grid.all(axis=1))[0].tolist()
         
         if lines_to_clear:
             # Start animation instead of immediately clearing
             self.lines_clearing = lines_to_clear.copy()
             self.clear_animation_time = 0
+            self.grid_dirty = True
         else:
             # No lines to clear, proceed normally
             self.finish_line_clear()
@@ -158,39 +450,59 @@ class TetrisGame:
         if not self.lines_clearing:
             return
             
-        # Actually clear the lines
-        for y in sorted(self.lines_clearing, reverse=True):
-            del self.grid[y]
-            self.grid.insert(0, [0 for _ in range(GRID_WIDTH)])
+        # Actually clear the lines by shifting the remaining rows down
+        lines_count = len(self.lines_clearing)
+        remaining = np.delete(self.grid, self.lines_clearing, axis=0)
+        self.grid[lines_count:] = remaining
+        self.grid[:lines_count] = 0
+        self.sync_row_masks()
+        self.grid_dirty = True
         
         # Update score and level
-        lines_count = len(self.lines_clearing)
         self.lines_cleared += lines_count
         self.score += lines_count * 100 * self.level
         self.level = self.lines_cleared // 10 + 1
         self.fall_speed = max(100, 1000 - (self.level - 1) * 100)
+        self.stats_dirty = True
         
         # Create enhanced particle effects for cleared lines
         grid_x, grid_y = 50, 50  # Same as in draw method
-        for y in self.lines_clearing:
-            for x in range(GRID_WIDTH):
-                if random.random() < 0.5:  # 50% chance for each block to create particles
-                    for _ in range(5):  # 5 particles per block
-                        particle = {
-                            'x': grid_x + x * BLOCK_SIZE + BLOCK_SIZE // 2,
-                            'y': grid_y + y * BLOCK_SIZE + BLOCK_SIZE // 2,
-                            'vx': random.uniform(-5, 5),
-                            'vy': random.uniform(-8, -2),
-                            'life': 1.0,
-                            'color': random.choice(TETROMINO_COLORS),
-                            'size': random.randint(3, 8)  # Variable particle sizes
-                        }
-                        self.particles.append(particle)
+        rows = np.repeat(self.lines_clearing, GRID_WIDTH)
+        cols = np.tile(np.arange(GRID_WIDTH), lines_count)
+        emitting = np.random.random(rows.size) < 0.5  # 50% chance for each block to create particles
+        self.spawn_particles(
+            np.repeat(grid_x + cols[emitting] * BLOCK_SIZE + BLOCK_SIZE // 2, 5),  # 5 particles per block
+            np.repeat(grid_y + rows[emitting] * BLOCK_SIZE + BLOCK_SIZE // 2, 5))
         
         # Reset animation
         self.lines_clearing = []
         self.clear_animation_time = 0
     
+    def spawn_particles(self, xs: np.ndarray, ys: np.ndarray):
+        """Append particles starting at the given pixel positions"""
+        start = self.p_count
+        end = start + len(xs)
+        if end > len(self.p_x):
+            self.grow_particles(end)
+        
+        count = end - start
+        self.p_x[start:end] = xs
+        self.p_y[start:end] = ys
+        self.p_vx[start:end] = np.random.uniform(-5, 5, count)
+        self.p_vy[start:end] = np.random.uniform(-8, -2, count)
+        self.p_life[start:end] = 1.0
+        self.p_size[start:end] = np.random.randint(3, 9, count)  # Variable particle sizes
+        self.p_color[start:end] = np.random.randint(1, len(TETROMINO_COLORS) + 1, count)
+        self.p_count = end
+    
+    def grow_particles(self, min_capacity: int):
+        """Reallocate the particle arrays with room for at least min_capacity"""
+        capacity = max(min_capacity, 2 * len(self.p_x))
+        for name, dtype in PARTICLE_FIELDS:
+            grown = np.zeros(capacity, dtype=dtype)
+            grown[:self.p_count] = getattr(self, name)[:self.p_count]
+            setattr(self, name, grown)
+    
     def move_piece(self, dx: int, dy: int) -> bool:
         """Move the current piece and return success status"""
         if self.current_piece is None:
@@ -212,41 +524,62 @@ class TetrisGame:
         if self.current_piece is None:
             return
         
-        old_shape = self.current_piece.shape
+        old_rotation = self.current_piece.rotation
         self.current_piece.rotate()
         
         if not self.is_valid_position(self.current_piece):
-            self.current_piece.shape = old_shape
+            self.current_piece.rotation = old_rotation
     
     def hard_drop(self):
         """Drop the piece all the way down"""
-        while self.move_piece(0, 1):
-            pass
+        if self.current_piece is None:
+            return
+        
+        # Distance each block can fall before hitting a block or the floor
+        drop = GRID_HEIGHT
+        occupied = self.grid != 0
+        for x, y in self.current_piece.get_positions():
+            below = occupied[y + 1:, x]
+            landing_y = y + 1 + int(below.argmax()) if below.any() else GRID_HEIGHT
+            drop = min(drop, landing_y - y - 1)
+        
+        self.current_piece.y += drop
+        self.place_piece()
     
     def spawn_random_block(self):
         """Spawn a random block on the grid"""
         # Find valid positions (only at bottom or on top of existing blocks)
-        valid_positions = []
-        
-        for x in range(GRID_WIDTH):
-            # Find the highest block in this column
-            highest_block_y = GRID_HEIGHT
-            for y in range(GRID_HEIGHT):
-                if self.grid[y][x] != 0:
-                    highest_block_y = y
-                    break
+        occupied = self.grid != 0
+        has_block = occupied.any(axis=0)
+        # Row of the highest block in each column (GRID_HEIGHT if column is empty)
+        tops = np.where(has_block, occupied.argmax(axis=0), GRID_HEIGHT)
+        valid_cols = np.nonzero(tops > 0)[0].tolist()
+        
+        if valid_cols:
+            # Place above the highest block (or at bottom if column is empty)
+            x = random.choice(valid_cols)
+            y = int(tops[x]) - 1
             
-            # Add position above the highest block (or at bottom if column is empty)
-            if highest_block_y > 0:
-                valid_positions.append((x, highest_block_y - 1))
-        
-        if valid_positions:
-            # Choose random position and color
-            x, y = random.choice(valid_positions)
-            color = random.choice(TETROMINO_COLORS)
-            self.grid[y][x] = color
+            # Choose random color index
+            color_idx = random.randint(1, len(TETROMINO_COLORS))
+            self.grid[y, x] = color_idx
+            self.row_mask[y] |= 1 << (BOARD_PAD + x)
+            self.grid_dirty = True
+    
+    def collect_blocks(self):
+        """Rebuild the lists of placed blocks to draw from the grid"""
+        filled_ys, filled_xs = np.nonzero(self.grid)
+        filled_colors = self.grid[filled_ys, filled_xs]
+        self.block_blits = []
+        self.clearing_blocks = []
+        for y, x, color_idx in zip(filled_ys.tolist(), filled_xs.tolist(), filled_colors.tolist()):
+            if y in self.lines_clearing:
+                self.clearing_blocks.append((y, x, color_idx))
+            else:
+                self.block_blits.append((self.block_templates[color_idx], self.cell_rects[y][x]))
+        self.grid_dirty = False
     
-    def update(self, dt: float):
+    def update(self, dt: int):
         """Update game state"""
         if self.game_over or self.paused:
             return
@@ -255,25 +588,25 @@ class TetrisGame:
         if self.fall_time >= self.fall_speed:
             self.move_piece(0, 1)
             self.fall_time = 0
+            self.dirty = True
         
         # Handle line clearing animation
         if self.lines_clearing:
+            self.dirty = True
             self.clear_animation_time += dt
             if self.clear_animation_time >= self.clear_animation_duration:
                 self.finish_line_clear()
         
         # Update particles
-        for particle in self.particles[:]:
-            particle['x'] += particle['vx']
-            particle['y'] += particle['vy']
-            particle['vy'] += 0.2  # Gravity
-            particle['life'] -= 0.02  # Fade out
-            
-            if particle['life'] <= 0:
-                self.particles.remove(particle)
+        if self.p_count:
+            self.dirty = True
+            self.p_count = step_particles(self.p_x, self.p_y, self.p_vx, self.p_vy,
+                                          self.p_life, self.p_size, self.p_color,
+                                          self.p_count)
         
         # Spawn random blocks (only if enabled)
         if self.random_blocks_enabled:
+            self.dirty = True  # Countdown text changes
             self.random_block_time += dt
             if self.random_block_time >= self.random_block_interval:
                 self.spawn_random_block()
@@ -283,119 +616,96 @@ class TetrisGame:
     
     def draw(self):
         """Draw the game"""
-        self.screen.fill(BLACK)
-        
-        # Draw grid background
+        # Draw cached grid background
+        self.screen.blit(self.bg_surface, (0, 0))
         grid_x = 50
         grid_y = 50
-        pygame.draw.rect(self.screen, GRAY, 
-                        (grid_x - 2, grid_y - 2, 
-                         GRID_WIDTH * BLOCK_SIZE + 4, 
-                         GRID_HEIGHT * BLOCK_SIZE + 4), 2)
         
-        # Draw background grid lines
-        for x in range(GRID_WIDTH + 1):
-            pygame.draw.line(self.screen, (40, 40, 40), 
-                           (grid_x + x * BLOCK_SIZE, grid_y), 
-                           (grid_x + x * BLOCK_SIZE, grid_y + GRID_HEIGHT * BLOCK_SIZE))
-        for y in range(GRID_HEIGHT + 1):
-            pygame.draw.line(self.screen, (40, 40, 40), 
-                           (grid_x, grid_y + y * BLOCK_SIZE), 
-                           (grid_x + GRID_WIDTH * BLOCK_SIZE, grid_y + y * BLOCK_SIZE))
+        # Draw placed blocks, batching the ones not being cleared
+        if self.grid_dirty:
+            self.collect_blocks()
+        self.screen.blits(self.block_blits, doreturn=False)
+        clearing_blocks = self.clearing_blocks
         
-        # Draw placed blocks
-        for y in range(GRID_HEIGHT):
-            for x in range(GRID_WIDTH):
-                if self.grid[y][x]:
-                    # Check if this line is being cleared
-                    is_clearing = y in self.lines_clearing
-                    
-                    # Calculate animation effects
-                    if is_clearing:
-                        # Enhanced flashing effect during clear animation
-                        progress = self.clear_animation_time / self.clear_animation_duration
-                        
-                        # Multi-color flashing effect
-                        if progress < 0.3:
-                            flash_color = (255, 255, 255)  # White flash
-                        elif progress < 0.6:
-                            flash_color = (255, 255, 0)    # Yellow flash
-                        else:
-                            flash_color = (255, 0, 0)      # Red flash
-                        
-                        # Pulsing effect
-                        pulse = abs(math.sin(progress * 20))  # Fast pulsing
-                        flash_alpha = int(255 * pulse)
-                        
-                        # Draw the main block
-                        pygame.draw.rect(self.screen, self.grid[y][x],
-                                       (grid_x + x * BLOCK_SIZE, 
-                                        grid_y + y * BLOCK_SIZE,
-                                        BLOCK_SIZE, BLOCK_SIZE))
-                        
-                        # Draw enhanced flashing overlay
-                        flash_surface = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE))
-                        flash_surface.fill(flash_color)
-                        flash_surface.set_alpha(flash_alpha)
-                        self.screen.blit(flash_surface, (grid_x + x * BLOCK_SIZE, grid_y + y * BLOCK_SIZE))
-                        
-                        # Add glow effect
-                        glow_size = int(BLOCK_SIZE * (1 + pulse * 0.3))
-                        glow_surface = pygame.Surface((glow_size, glow_size))
-                        glow_surface.fill(flash_color)
-                        glow_surface.set_alpha(flash_alpha // 3)
-                        glow_x = grid_x + x * BLOCK_SIZE - (glow_size - BLOCK_SIZE) // 2
-                        glow_y = grid_y + y * BLOCK_SIZE - (glow_size - BLOCK_SIZE) // 2
-                        self.screen.blit(glow_surface, (glow_x, glow_y))
-                    else:
-                        # Normal block drawing
-                        pygame.draw.rect(self.screen, self.grid[y][x],
-                                       (grid_x + x * BLOCK_SIZE, 
-                                        grid_y + y * BLOCK_SIZE,
-                                        BLOCK_SIZE, BLOCK_SIZE))
-                    
-                    # Draw block border
-                    pygame.draw.rect(self.screen, WHITE,
-                                   (grid_x + x * BLOCK_SIZE, 
-                                    grid_y + y * BLOCK_SIZE,
-                                    BLOCK_SIZE, BLOCK_SIZE), 1)
+        # Draw blocks of lines being cleared
+        if clearing_blocks:
+            # Enhanced flashing effect during clear animation (same for every block)
+            progress = self.clear_animation_time / self.clear_animation_duration
+            
+            # Multi-color flashing effect
+            if progress < 0.3:
+                flash_color = (255, 255, 255)  # White flash
+            elif progress < 0.6:
+                flash_color = (255, 255, 0)    # Yellow flash
+            else:
+                flash_color = (255, 0, 0)      # Red flash
+            
+            # Pulsing effect
+            pulse = abs(math.sin(progress * 20))  # Fast pulsing
+            flash_alpha = int(255 * pulse)
+            
+            # Flashing overlay and glow surfaces shared by all clearing blocks
+            flash_surface = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE)).convert()
+            flash_surface.fill(flash_color)
+            flash_surface.set_alpha(flash_alpha)
+            
+            glow_size = int(BLOCK_SIZE * (1 + pulse * 0.3))
+            glow_surface = pygame.Surface((glow_size, glow_size)).convert()
+            glow_surface.fill(flash_color)
+            glow_surface.set_alpha(flash_alpha // 3)
+            glow_offset = (glow_size - BLOCK_SIZE) // 2
+            
+            for y, x, color_idx in clearing_blocks:
+                rect = self.cell_rects[y][x]
+                
+                # Draw the main block
+                pygame.draw.rect(self.screen, PALETTE[color_idx], rect)
+                
+                # Draw enhanced flashing overlay
+                self.screen.blit(flash_surface, rect)
+                
+                # Add glow effect
+                self.screen.blit(glow_surface, (rect.x - glow_offset, rect.y - glow_offset))
+                
+                # Draw block border
+                pygame.draw.rect(self.screen, WHITE, rect, 1)
         
         # Draw current piece
         if self.current_piece:
-            for x, y in self.current_piece.get_positions():
-                if 0 <= y < GRID_HEIGHT and 0 <= x < GRID_WIDTH:
-                    pygame.draw.rect(self.screen, self.current_piece.color,
-                                   (grid_x + x * BLOCK_SIZE, 
-                                    grid_y + y * BLOCK_SIZE,
-                                    BLOCK_SIZE, BLOCK_SIZE))
-                    pygame.draw.rect(self.screen, WHITE,
-                                   (grid_x + x * BLOCK_SIZE, 
-                                    grid_y + y * BLOCK_SIZE,
-                                    BLOCK_SIZE, BLOCK_SIZE), 1)
+            block_template = self.block_templates[self.current_piece.color_idx]
+            self.screen.blits([(block_template, self.cell_rects[y][x])
+                               for x, y in self.current_piece.get_positions()
+                               if 0 <= y < GRID_HEIGHT and 0 <= x < GRID_WIDTH], doreturn=False)
         
         # Draw enhanced particles
-        for particle in self.particles:
-            alpha = int(255 * particle['life'])
-            size = particle.get('size', 4)  # Default size if not set
-            particle_surface = pygame.Surface((size, size))
-            particle_surface.fill(particle['color'])
-            particle_surface.set_alpha(alpha)
-            self.screen.blit(particle_surface, (particle['x'] - size//2, particle['y'] - size//2))
+        n = self.p_count
+        alpha_levels = (self.p_life[:n] * (PARTICLE_ALPHA_LEVELS - 1)).astype(np.int32)
+        particle_blits = []
+        for px, py, alpha_level, size, color_idx in zip(self.p_x[:n].tolist(), self.p_y[:n].tolist(),
+                                                        alpha_levels.tolist(), self.p_size[:n].tolist(),
+                                                        self.p_color[:n].tolist()):
+            particle_surface = self.get_particle_template(color_idx, size, alpha_level)
+            particle_blits.append((particle_surface, (px - size//2, py - size//2)))
+        self.screen.blits(particle_blits, doreturn=False)
         
         # Draw UI
         ui_x = grid_x + GRID_WIDTH * BLOCK_SIZE + 20
         
+        # Re-render score, level and lines text only when they change
+        if self.stats_dirty:
+            self.score_surf = self.font.render(f"Score: {self.score}", True, WHITE).convert_alpha()
+            self.level_surf = self.font.render(f"Level: {self.level}", True, WHITE).convert_alpha()
+            self.lines_surf = self.font.render(f"Lines: {self.lines_cleared}", True, WHITE).convert_alpha()
+            self.stats_dirty = False
+        
         # Score
-        score_text = self.font.render(f"Score: {self.score}", True, WHITE)
-        self.screen.blit(score_text, (ui_x, 50))
+        self.screen.blit(self.score_surf, (ui_x, 50))
         
         # Level
-        level_text = self.font.render(f"Level: {self.level}", True, WHITE)
-        self.screen.blit(level_text, (ui_x, 100))
+        self.screen.blit(self.level_surf, (ui_x, 100))
         
         # Lines
-        lines_text = self.font.render(f"Lines: {self.lines_cleared}", True, WHITE)
-        self.screen.blit(lines_text, (ui_x, 150))
+        self.screen.blit(self.lines_surf, (ui_x, 150))
         
         # Next piece preview
         next_text = self.font.render("Next:", True, WHITE)
@@ -404,98 +714,19 @@ class TetrisGame:
         if self.next_piece:
             preview_x = ui_x + 20
             preview_y = 250
-            for r in range(len(self.next_piece.shape)):
-                for c in range(len(self.next_piece.shape[0])):
-                    if self.next_piece.shape[r][c]:
-                        pygame.draw.rect(self.screen, self.next_piece.color,
-                                       (preview_x + c * BLOCK_SIZE, 
-                                        preview_y + r * BLOCK_SIZE,
-                                        BLOCK_SIZE, BLOCK_SIZE))
-                        pygame.draw.rect(self.screen, WHITE,
-                                       (preview_x + c * BLOCK_SIZE, 
-                                        preview_y + r * BLOCK_SIZE,
-                                        BLOCK_SIZE, BLOCK_SIZE), 1)
-        
-        # Controls info
+            for c, r in self.next_piece.offsets:
+                pygame.draw.rect(self.screen, self.next_piece.color,
+                               (preview_x + c * BLOCK_SIZE, 
+                                preview_y + r * BLOCK_SIZE,
+                                BLOCK_SIZE, BLOCK_SIZE))
+                pygame.draw.rect(self.screen, WHITE,
+                               (preview_x + c * BLOCK_SIZE, 
+                                preview_y + r * BLOCK_SIZE,
+                                BLOCK_SIZE, BLOCK_SIZE), 1)
+        
+        # Controls info (static, pre-rendered)
         controls_y = 400
-        
-        # Draw controls title
-        controls_title = self.font.render("Controls:", True, WHITE)
-        self.screen.blit(controls_title, (ui_x, controls_y))
-        
-        # Draw arrow controls with visual arrows
-        arrow_controls = [
-            ("Move Left/Right", "←", "→"),
-            ("Soft Drop", "↓", ""),
-            ("Rotate", "↑", ""),
-            ("Hard Drop", "Space", ""),  # Changed back to "Space" for proper positioning
-            ("Pause", "P", ""),
-            ("Random Blocks", "B", ""),
-            ("Restart", "R", "")
-        ]
-        
-        for i, (action, key1, key2) in enumerate(arrow_controls):
-            y_pos = controls_y + 40 + i * 22  # Even more compact spacing
-            
-            # Draw action text
-            action_text = self.small_font.render(action, True, GRAY)
-            self.screen.blit(action_text, (ui_x, y_pos))
-            
-            # Draw key/arrow
-            if key1 in ["←", "→", "↑", "↓"]:
-                # Draw arrow symbol
-                arrow_color = WHITE
-                arrow_size = 8  # Even smaller arrows
-                arrow_x = ui_x + 140  # Moved closer to text
-                arrow_y = y_pos + 8
-                
-                if key1 == "←":
-                    # Left arrow
-                    pygame.draw.polygon(self.screen, arrow_color, [
-                        (arrow_x + arrow_size, arrow_y),
-                        (arrow_x, arrow_y + arrow_size//2),
-                        (arrow_x + arrow_size, arrow_y + arrow_size)
-                    ])
-                elif key1 == "→":
-                    # Right arrow
-                    pygame.draw.polygon(self.screen, arrow_color, [
-                        (arrow_x, arrow_y),
-                        (arrow_x + arrow_size, arrow_y + arrow_size//2),
-                        (arrow_x, arrow_y + arrow_size)
-                    ])
-                elif key1 == "↑":
-                    # Up arrow
-                    pygame.draw.polygon(self.screen, arrow_color, [
-                        (arrow_x, arrow_y + arrow_size),
-                        (arrow_x + arrow_size//2, arrow_y),
-                        (arrow_x + arrow_size, arrow_y + arrow_size)
-                    ])
-                elif key1 == "↓":
-                    # Down arrow
-                    pygame.draw.polygon(self.screen, arrow_color, [
-                        (arrow_x, arrow_y),
-                        (arrow_x + arrow_size//2, arrow_y + arrow_size),
-                        (arrow_x + arrow_size, arrow_y)
-                    ])
-                
-                # Draw second arrow if needed (for left/right)
-                if key2 in ["←", "→", "↑", "↓"]:
-                    arrow_x2 = arrow_x + 15  # Even tighter spacing
-                    if key2 == "→":
-                        pygame.draw.polygon(self.screen, arrow_color, [
-                            (arrow_x2, arrow_y),
-                            (arrow_x2 + arrow_size, arrow_y + arrow_size//2),
-                            (arrow_x2, arrow_y + arrow_size)
-                        ])
-            else:
-                # Draw regular key text
-                key_text = self.small_font.render(key1, True, WHITE)
-                # Position "Space" further left, other keys closer to arrows
-                if key1 == "Space":
-                    key_x = ui_x + 120  # Much further left for "Space"
-                else:
-                    key_x = ui_x + 140  # Normal position for P, B, R
-                self.screen.blit(key_text, (key_x, y_pos))
+        self.screen.blit(self.controls_surface, (ui_x, controls_y))
         
         # Random block status and timer
         if self.random_blocks_enabled:
@@ -507,13 +738,10 @@ class TetrisGame:
         
         # Game over or pause overlay
         if self.game_over:
-            overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-            overlay.set_alpha(128)
-            overlay.fill(BLACK)
-            self.screen.blit(overlay, (0, 0))
+            self.screen.blit(self.dim_overlay, (0, 0))
             
-            game_over_text = self.font.render("GAME OVER", True, RED)
-            restart_text = self.small_font.render("Press R to restart", True, WHITE)
+            game_over_text = self.game_over_surf
+            restart_text = self.restart_surf
             
             self.screen.blit(game_over_text, 
                            (WINDOW_WIDTH // 2 - game_over_text.get_width() // 2, 
@@ -523,12 +751,9 @@ class TetrisGame:
                             WINDOW_HEIGHT // 2))
         
         elif self.paused:
-            overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-            overlay.set_alpha(128)
-            overlay.fill(BLACK)
-            self.screen.blit(overlay, (0, 0))
+            self.screen.blit(self.dim_overlay, (0, 0))
             
-            pause_text = self.font.render("PAUSED", True, YELLOW)
+            pause_text = self.paused_surf
             self.screen.blit(pause_text, 
                            (WINDOW_WIDTH // 2 - pause_text.get_width() // 2, 
                             WINDOW_HEIGHT // 2))
@@ -541,9 +766,13 @@ class TetrisGame:
             if event.type == pygame.QUIT:
                 return False
             
+            if event.type == pygame.WINDOWEXPOSED:
+                self.dirty = True
+            
             if event.type == pygame.KEYDOWN:
+                self.dirty = True
                 if event.key == pygame.K_r:
-                    self.__init__()  # Restart game anytime R is pressed
+                    self.reset_state()  # Restart game anytime R is pressed
                 elif event.key == pygame.K_p:
                     self.paused = not self.paused
                 elif event.key == pygame.K_b:
@@ -565,18 +794,15 @@ class TetrisGame:
     def run(self):
         """Main game loop"""
         running = True
-        last_time = time.time()
         
         while running:
-            current_time = time.time()
-            dt = (current_time - last_time) * 1000  # Convert to milliseconds
-            last_time = current_time
+            dt = self.clock.tick(60)  # Milliseconds since the previous frame
             
             running = self.handle_events()
             self.update(dt)
-            self.draw()
-            
-            self.clock.tick(60)
+            if self.dirty:
+                self.draw()
+                self.dirty = False
         
         pygame.quit()
 